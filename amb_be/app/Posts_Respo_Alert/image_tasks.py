@@ -0,0 +1,59 @@
+from flask import current_app
+from PIL import Image, ImageOps
+from redis import Redis
+from rq import Queue
+from sqlalchemy import update
+import os
+
+# Bounding box of the processed image that replaces the original upload on a post
+PROCESSED_IMAGE_SIZE = (512, 512)
+
+# RQ queues by Redis URL, so enqueueing reuses one connection per worker process
+_queues = {}
+
+# App used by RQ workers, which run outside any request
+_worker_app = None
+
+# Queue an uploaded post image for resizing and EXIF stripping; a no-op when no queue is configured.
+# Callers have already committed the post, so a queue outage is logged and the original upload stays in use.
+def enqueue_image_processing(post_id, filename, upload_folder, stale_cache_keys=()):
+    redis_url = current_app.config.get('IMAGE_QUEUE_REDIS_URL')
+    if not redis_url:
+        return
+
+    try:
+        if redis_url not in _queues:
+            _queues[redis_url] = Queue('post_images', connection=Redis.from_url(redis_url))
+        _queues[redis_url].enqueue(process_post_image, post_id, filename, str(upload_folder), list(stale_cache_keys))
+    except Exception:
+        current_app.logger.exception(f'Failed to queue image processing for post {post_id}')
+
+# RQ job: write a resized copy without EXIF metadata and point the post at it
+def process_post_image(post_id, filename, upload_folder, stale_cache_keys):
+    global _worker_app
+    from app import create_app, db, cache_delete
+    from app.models import Post
+
+    if _worker_app is None:
+        _worker_app = create_app()
+
+    with _worker_app.app_context():
+        stem, extension = os.path.splitext(filename)
+        processed_filename = f'{stem}_{PROCESSED_IMAGE_SIZE[0]}{extension}'
+
+        with Image.open(os.path.join(upload_folder, filename)) as original:
+            image_format = original.format
+            image = ImageOps.exif_transpose(original)  # Keep the orientation EXIF would have applied
+            image.thumbnail(PROCESSED_IMAGE_SIZE)
+            if image_format == 'JPEG' and image.mode not in ('RGB', 'L'):
+                image = image.convert('RGB')
+            image.save(os.path.join(upload_folder, processed_filename), format=image_format)  # Re-encoding drops EXIF
+
+        # Only swap the image if the post still uses the upload this job was queued for
+        db.session.execute(
+            update(Post)
+            .where(Post.id == post_id, Post.image == filename)
+            .values(image=processed_filename)
+        )
+        db.session.commit()
+        cache_delete(*stale_cache_keys)
@@ -0,0 +1,448 @@
+from flask import Blueprint, request, jsonify, current_app
+from werkzeug.utils import secure_filename
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from app import db, cache_get, cache_set, cache_delete
+from app.models import Post, User, Comment, post_search_vector
+from app.Posts_Respo_Alert.image_tasks import enqueue_image_processing
+from sqlalchemy import func, select, insert, update, delete, tuple_, literal
+from sqlalchemy.exc import InvalidRequestError
+from sqlalchemy.orm import selectinload, raiseload, undefer_group
+from datetime import datetime
+import hashlib
+import os
+import sys
+import tempfile
+
+# Characters that make a keyword a pattern rather than words; those searches skip full-text matching
+WILDCARD_CHARS = frozenset('%_*?')
+
+# Mode for stored images: what a plain open() would create under the process umask (usually 0644), so the web
+# server serving uploads via X-Accel-Redirect can read them. Read once at import; os.umask can only be read by setting it.
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+STORED_IMAGE_MODE = 0o666 & ~_UMASK
+
+# Page sizes for the list and search endpoints
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# Helper function to take the extension of a client-supplied filename, without secure_filename's regexes.
+# Stored names are '<sha256><extension>', so only a short alphanumeric extension is kept from the client.
+def image_extension(filename):
+    extension = os.path.splitext(filename or '')[1].lower()
+    return extension if 1 < len(extension) <= 10 and extension[1:].isalnum() else ''
+
+# Helper function to save images securely
+def save_image(image, upload_folder):
+    return save_image_stream(image.stream, image.filename, upload_folder)
+
+# Helper function to write an image stream to the upload folder in 1MB chunks.
+# The stored file is named after the SHA-256 of its content, so identical uploads are
+# stored once and different uploads with the same name never overwrite each other.
+def save_image_stream(stream, filename, upload_folder):
+    extension = image_extension(filename)
+    digest = hashlib.sha256()
+    source_fd = file_descriptor(stream)
+    with tempfile.NamedTemporaryFile(dir=upload_folder, delete=False) as tmp:
+        try:
+            if source_fd is not None:
+                # Upload already on disk: hash it, then let the kernel copy it with sendfile
+                start = stream.tell()
+                for chunk in iter(lambda: stream.read(1 << 20), b''):
+                    digest.update(chunk)
+                offset, end = start, stream.tell()
+                while offset < end:
+                    sent = os.sendfile(tmp.fileno(), source_fd, offset, min(1 << 20, end - offset))
+                    if sent == 0:
+                        # Source shrank after it was hashed; the copy would not match the digest
+                        raise OSError('Upload was truncated while being saved')
+                    offset += sent
+            else:
+                while True:
+                    chunk = stream.read(1 << 20)  # Only one 1MB buffer lives at a time
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    tmp.write(chunk)
+        except Exception:
+            os.remove(tmp.name)
+            raise
+
+    filename = digest.hexdigest() + extension
+    filepath = os.path.join(upload_folder, filename)
+    if os.path.exists(filepath):
+        os.remove(tmp.name)  # Same image already stored
+    else:
+        os.chmod(tmp.name, STORED_IMAGE_MODE)  # Temp files are created 0600
+        os.replace(tmp.name, filepath)
+    return filename
+
+# Helper function returning the OS file descriptor behind an upload stream, or None when it has none.
+# Only Linux sendfile() accepts a regular file as destination; spooled buffers are skipped since fileno() would force them to disk.
+def file_descriptor(stream):
+    if not sys.platform.startswith('linux') or isinstance(stream, tempfile.SpooledTemporaryFile):
+        return None
+    try:
+        return stream.fileno()
+    except (AttributeError, OSError):
+        return None
+
+# Fields every post must have, with the error reported when one is missing (built once at import)
+REQUIRED_POST_FIELDS = (
+    ('description', 'Description is required.'),
+    ('location', 'Location is required.'),
+    ('contact_info', 'Contact information is required.')
+)
+
+# Helper function to validate post data
+def validate_post_data(data):
+    return [message for field, message in REQUIRED_POST_FIELDS if not data.get(field)]
+
+# Helper function to read keyset pagination arguments (?after_date=&after_id=&limit=); raises ValueError when malformed
+def parse_page_args(args):
+    limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    limit = min(limit, MAX_PAGE_SIZE)
+
+    after = None
+    if args.get('after_date') or args.get('after_id'):
+        after = (datetime.fromisoformat(args['after_date']), int(args['after_id']))
+    return after, limit
+
+# Helper function to run a list query one page at a time, newest first.
+# Seeks past the (date_posted, id) cursor instead of using OFFSET, so every page costs the same.
+def paginate(query, after, limit):
+    if after:
+        query = query.where(tuple_(Post.date_posted, Post.id) < after)
+    query = query.order_by(Post.date_posted.desc(), Post.id.desc()).limit(limit)
+
+    items = [dict(row._mapping) for row in db.session.execute(query)]
+    next_cursor = None
+    if len(items) == limit:
+        last = items[-1]
+        next_cursor = {'after_date': last['date_posted'].isoformat(), 'after_id': last['id']}
+    return {'items': items, 'next_cursor': next_cursor}
+
+# Helper function to apply the ?keyword=&location= filters shared by the search endpoints
+def apply_search_filters(query, args):
+    keyword = args.get('keyword', '').lower()
+    location = args.get('location', '').lower()
+    if keyword:
+        if db.engine.dialect.name == 'postgresql' and not WILDCARD_CHARS.intersection(keyword):
+            # Full-text match served by the search_vector GIN index
+            query = query.where(post_search_vector.op('@@')(func.plainto_tsquery('english', keyword)))
+        else:
+            query = query.where(func.lower(Post.description).ilike(f'%{keyword}%'))
+    if location:
+        query = query.where(func.lower(Post.location).ilike(f'%{location}%'))
+    return query
+
+# Build the blueprint for one post type (found, lost, looking); every route is closed over `model`
+def make_post_bp(name, model, url_base):
+    bp = Blueprint(name, __name__)
+    label = name.capitalize()
+    post_type = model.__mapper__.polymorphic_identity
+
+    # Cache keys for the responses that are identical for every user
+    list_cache_key = f'{name}_posts_all'
+    post_cache_key = lambda post_id: f'{name}_post_{post_id}'
+    comments_cache_key = lambda post_id: f'{name}_comments_{post_id}'
+
+    # Resolve the upload folder once, when the blueprint is registered, instead of on every upload
+    @bp.record
+    def capture_upload_folder(state):
+        bp.upload_folder = state.app.upload_dir
+
+    # Helper to tell a missing post from one owned by someone else after a guarded write matched no row
+    def ownership_error(post_id, action):
+        if db.session.get(model, post_id) is None:
+            return jsonify({'message': 'Post not found'}), 404
+        return jsonify({'message': f'Unauthorized to {action} this post'}), 403
+
+    # Only the columns the list and search endpoints return, joined with the author in a single query
+    def list_query():
+        return select(
+            model.id,
+            model.description,
+            model.location,
+            model.contact_info,
+            model.image,
+            model.date_posted,
+            User.username
+        ).join(User, model.user_id == User.id)
+
+    # Upload a large image as a raw request body, bypassing multipart parsing
+    @bp.route(f'{url_base}/upload-stream', methods=['POST'])
+    @jwt_required()
+    def upload_image_stream():
+        try:
+            if request.mimetype != 'application/octet-stream':
+                return jsonify({'message': 'Content-Type must be application/octet-stream'}), 415
+            filename = request.args.get('filename', '')  # Only its extension is kept
+            if not filename:
+                return jsonify({'message': 'Filename is required'}), 400
+            if not request.content_length:
+                return jsonify({'message': 'Image data is required'}), 400
+
+            image_filename = save_image_stream(request.stream, filename, bp.upload_folder)
+            return jsonify({'message': 'Image uploaded successfully', 'image': image_filename}), 201
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Create a new post with optional image upload
+    @bp.route(url_base, methods=['POST'])
+    @jwt_required()
+    def create_post():
+        try:
+            data = request.form  # Use form data to handle image upload
+            image = request.files.get('image')  # Handle image upload if present
+
+            # Validate input data
+            errors = validate_post_data(data)
+            if errors:
+                return jsonify({'errors': errors}), 400
+
+            # Save the image if provided
+            image_filename = None
+            if image:
+                image_filename = save_image(image, bp.upload_folder)
+            elif data.get('image'):
+                # Image sent beforehand through the upload-stream route
+                image_filename = secure_filename(data['image'])
+                if not os.path.exists(os.path.join(bp.upload_folder, image_filename)):
+                    return jsonify({'message': 'Image not found'}), 400
+
+            # Get the current user from JWT
+            user_id = get_jwt_identity()
+            with db.session.no_autoflush:  # Nothing is pending yet; skip the flush check before the lookup
+                user = db.session.get(User, user_id)
+
+            if not user:
+                return jsonify({'message': 'User not found'}), 404
+
+            # Create the new post
+            new_post = model(
+                description=data.get('description'),
+                location=data.get('location'),
+                contact_info=data.get('contact_info'),
+                user_id=user.id,
+                image=image_filename  # Store the image filename if provided
+            )
+            db.session.add(new_post)
+            db.session.commit()
+            cache_delete(list_cache_key)
+
+            # Resizing and EXIF stripping happen in the background worker
+            if image_filename:
+                enqueue_image_processing(new_post.id, image_filename, bp.upload_folder,
+                                         [list_cache_key, post_cache_key(new_post.id)])
+
+            return jsonify({'message': f'{label} post created successfully', 'image': image_filename}), 201
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Get all posts
+    @bp.route(url_base, methods=['GET'])
+    def get_all_posts():
+        try:
+            # The unfiltered first page is the same for everyone, so it is served from the cache
+            if not request.args:
+                page = cache_get(list_cache_key)
+                if page is None:
+                    page = paginate(list_query(), None, DEFAULT_PAGE_SIZE)
+                    cache_set(list_cache_key, page, timeout=30)
+                return jsonify(page), 200
+
+            try:
+                after, limit = parse_page_args(request.args)
+            except (KeyError, ValueError):
+                return jsonify({'message': 'Invalid pagination parameters'}), 400
+
+            return jsonify(paginate(list_query(), after, limit)), 200
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Get a specific post by ID
+    @bp.route(f'{url_base}/<int:post_id>', methods=['GET'])
+    def get_post(post_id):
+        try:
+            post_data = cache_get(post_cache_key(post_id))
+            if post_data is None:
+                post = db.session.get(model, post_id, options=[undefer_group('long')])
+
+                if not post:
+                    return jsonify({'message': 'Post not found'}), 404
+
+                post_data = {
+                    'id': post.id,
+                    'description': post.description,
+                    'location': post.location,
+                    'contact_info': post.contact_info,
+                    'image': post.image,
+                    'date_posted': post.date_posted,
+                    'username': post.user.username
+                }
+                cache_set(post_cache_key(post_id), post_data, timeout=60)
+
+            return jsonify(post_data), 200
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Search posts by keyword and location
+    @bp.route(f'{url_base}/search', methods=['GET'])
+    def search_posts():
+        try:
+            try:
+                after, limit = parse_page_args(request.args)
+            except (KeyError, ValueError):
+                return jsonify({'message': 'Invalid pagination parameters'}), 400
+
+            # Build search query based on keyword and location
+            query = apply_search_filters(list_query(), request.args)
+
+            return jsonify(paginate(query, after, limit)), 200
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Update a post (only the creator can update it)
+    @bp.route(f'{url_base}/<int:post_id>', methods=['PUT'])
+    @jwt_required()
+    def update_post(post_id):
+        try:
+            user_id = get_jwt_identity()
+            data = request.form  # Use form data to handle image upload
+            image = request.files.get('image')  # Handle image upload if present
+
+            # Validate input data
+            errors = validate_post_data(data)
+            if errors:
+                return jsonify({'errors': errors}), 400
+
+            # Update post details
+            values = {
+                'description': data.get('description'),
+                'location': data.get('location'),
+                'contact_info': data.get('contact_info')
+            }
+
+            # If a new image is uploaded, save it and update the image field
+            if image:
+                values['image'] = save_image(image, bp.upload_folder)
+            elif data.get('image'):
+                # Image sent beforehand through the upload-stream route
+                values['image'] = secure_filename(data['image'])
+                if not os.path.exists(os.path.join(bp.upload_folder, values['image'])):
+                    return jsonify({'message': 'Image not found'}), 400
+
+            # Ownership is checked in the WHERE clause, so lookup, authorization and update share one round trip
+            updated = db.session.execute(
+                update(Post)
+                .where(Post.id == post_id, Post.user_id == user_id, Post.post_type == post_type)
+                .values(**values)
+                .returning(Post.id)
+            ).first()
+            if updated is None:
+                db.session.rollback()
+                return ownership_error(post_id, 'update')
+
+            db.session.commit()
+            cache_delete(list_cache_key, post_cache_key(post_id))
+
+            # Resizing and EXIF stripping happen in the background worker
+            if 'image' in values:
+                enqueue_image_processing(post_id, values['image'], bp.upload_folder,
+                                         [list_cache_key, post_cache_key(post_id)])
+            return jsonify({'message': f'{label} post updated successfully'}), 200
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Delete a post (only the creator can delete it)
+    @bp.route(f'{url_base}/<int:post_id>', methods=['DELETE'])
+    @jwt_required()
+    def delete_post(post_id):
+        try:
+            user_id = get_jwt_identity()
+
+            # Ownership is checked in the WHERE clause; the subtype row and comments go with it via ON DELETE CASCADE
+            deleted = db.session.execute(
+                delete(Post)
+                .where(Post.id == post_id, Post.user_id == user_id, Post.post_type == post_type)
+                .returning(Post.id)
+            ).first()
+            if deleted is None:
+                db.session.rollback()
+                return ownership_error(post_id, 'delete')
+
+            db.session.commit()
+            cache_delete(list_cache_key, post_cache_key(post_id), comments_cache_key(post_id))
+            return jsonify({'message': f'{label} post deleted successfully'}), 200
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Add a comment to a post
+    @bp.route(f'{url_base}/<int:post_id>/comment', methods=['POST'])
+    @jwt_required()
+    def add_comment(post_id):
+        try:
+            data = request.get_json()
+            content = data.get('content')
+
+            if not content:
+                return jsonify({'message': 'Comment content is required'}), 400
+
+            user_id = get_jwt_identity()
+
+            # INSERT ... SELECT ... RETURNING checks the post exists and inserts in one statement:
+            # the whole request is a single BEGIN; INSERT; COMMIT with no ORM object to flush
+            comment_id = db.session.execute(
+                insert(Comment)
+                .from_select(
+                    ['content', 'user_id', 'post_id'],
+                    select(literal(content), literal(user_id), model.id).where(model.id == post_id)
+                )
+                .returning(Comment.id)
+            ).scalar()
+            if comment_id is None:
+                db.session.rollback()
+                return jsonify({'message': 'Post not found'}), 404
+
+            db.session.commit()
+            cache_delete(comments_cache_key(post_id))
+
+            return jsonify({'message': 'Comment added successfully', 'id': comment_id}), 201
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    # Get comments for a post
+    @bp.route(f'{url_base}/<int:post_id>/comments', methods=['GET'])
+    def get_comments(post_id):
+        try:
+            comments_data = cache_get(comments_cache_key(post_id))
+            if comments_data is None:
+                post = db.session.get(model, post_id)
+
+                if not post:
+                    return jsonify({'message': 'Post not found'}), 404
+
+                comments = Comment.query.options(selectinload(Comment.user), raiseload('*')).filter_by(post_id=post_id).all()
+                comments_data = [
+                    {
+                        'id': comment.id,
+                        'content': comment.content,
+                        'date_posted': comment.date_posted,
+                        'username': comment.user.username
+                    }
+                    for comment in comments
+                ]
+                cache_set(comments_cache_key(post_id), comments_data, timeout=60)
+
+            return jsonify(comments_data), 200
+        except InvalidRequestError as e:
+            # Raised by raiseload('*') when a relationship was not eager-loaded
+            current_app.logger.exception(f'Unexpected lazy load in {name}.get_comments')
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+        except Exception as e:
+            return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+    return bp
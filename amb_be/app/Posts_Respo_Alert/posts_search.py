@@ -0,0 +1,40 @@
+from flask import Blueprint, request, jsonify
+from app.models import Post, User
+from app.Posts_Respo_Alert.posts_factory import apply_search_filters, paginate, parse_page_args
+from sqlalchemy import select
+
+# Define the blueprint for searching across post types
+posts_bp = Blueprint('posts', __name__)
+
+# Post types a cross-type search may cover
+SEARCHABLE_POST_TYPES = ('found', 'lost', 'looking')
+
+# Search found, lost and looking posts in one request (?types=found,lost&keyword=&location=).
+# Every post type shares the posts table, so this is a single query over it rather than a UNION ALL.
+@posts_bp.route('/posts/search', methods=['GET'])
+def search_all_posts():
+    try:
+        types = [t for t in request.args.get('types', ','.join(SEARCHABLE_POST_TYPES)).split(',') if t]
+        if not types or not set(types) <= set(SEARCHABLE_POST_TYPES):
+            return jsonify({'message': f"types must be among: {', '.join(SEARCHABLE_POST_TYPES)}"}), 400
+
+        try:
+            after, limit = parse_page_args(request.args)
+        except (KeyError, ValueError):
+            return jsonify({'message': 'Invalid pagination parameters'}), 400
+
+        query = select(
+            Post.post_type.label('type'),
+            Post.id,
+            Post.description,
+            Post.location,
+            Post.contact_info,
+            Post.image,
+            Post.date_posted,
+            User.username
+        ).join(User, Post.user_id == User.id).where(Post.post_type.in_(types))
+        query = apply_search_filters(query, request.args)
+
+        return jsonify(paginate(query, after, limit)), 200
+    except Exception as e:
+        return jsonify({'message': f'An error occurred: {str(e)}'}), 500
@@ -1,24 +1,95 @@
-from flask import Blueprint, request, jsonify, current_app, send_from_directory
+from flask import Blueprint, request, jsonify, current_app
 from werkzeug.utils import secure_filename
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from app import db
-from app.models import StolenPost, User, Comment
+from app import db, cache_get, cache_set, json_response
+from app.models import StolenPost, User, Comment, post_search_vector
+from app.Posts_Respo_Alert.posts_factory import save_image, save_image_stream, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from sqlalchemy import func, event, select, lambda_stmt
+from sqlalchemy.orm import Session, selectinload, raiseload, undefer_group
 import os
+import time
 
 # Define the blueprint for stolen posts
 stolen_bp = Blueprint('stolen', __name__)
 
-# Helper function to save images
-def save_image(image):
-    filename = secure_filename(image.filename)
-    filepath = os.path.join(current_app.config['UPLOAD_FOLDER'], filename)
-    image.save(filepath)
-    return filename
-
-# Serve uploaded images
-@stolen_bp.route('/uploads/<filename>')
-def uploaded_file(filename):
-    return send_from_directory(current_app.config['UPLOAD_FOLDER'], filename)
+# Cache key holding the time of the last committed change to stolen posts or comments.
+# Cached responses include it in their key, so any change makes them unreachable.
+STOLEN_VERSION_KEY = 'stolen_version'
+
+# Helper function to read the current stolen-data version, starting a new one if it was evicted
+def get_stolen_version():
+    version = cache_get(STOLEN_VERSION_KEY)
+    if version is None:
+        version = time.time_ns()
+        cache_set(STOLEN_VERSION_KEY, version, timeout=0)
+    return version
+
+# Note flushes that touch stolen posts or comments, then bump the version once the transaction commits
+@event.listens_for(Session, 'before_flush')
+def track_stolen_changes(session, flush_context, instances):
+    if any(isinstance(obj, (StolenPost, Comment)) for obj in (*session.new, *session.dirty, *session.deleted)):
+        session.info['stolen_changed'] = True
+
+@event.listens_for(Session, 'after_commit')
+def bump_stolen_version(session):
+    if session.info.pop('stolen_changed', False):
+        cache_set(STOLEN_VERSION_KEY, time.time_ns(), timeout=0)
+
+@event.listens_for(Session, 'after_soft_rollback')
+def forget_stolen_changes(session, previous_transaction):
+    session.info.pop('stolen_changed', None)
+
+# Length of the description snippet in list and search results; the full text comes from the detail endpoint
+SNIPPET_LENGTH = 140
+
+# Only the columns the list and search endpoints return, joined with the author; rows are read as plain tuples.
+# The database truncates the description, so the long text columns never leave it for list views.
+def stolen_list_query():
+    return select(
+        StolenPost.id,
+        func.substr(StolenPost.description, 1, SNIPPET_LENGTH).label('description_snippet'),
+        StolenPost.location,
+        StolenPost.image,
+        StolenPost.date_posted,
+        User.username
+    ).join(User, StolenPost.user_id == User.id)
+
+# Helper function to read ?after=<id>&limit= pagination arguments; raises ValueError when malformed
+def parse_stolen_page_args(args):
+    limit = int(args.get('limit', DEFAULT_PAGE_SIZE))
+    if limit < 1:
+        raise ValueError('limit must be positive')
+    after = int(args['after']) if args.get('after') else None
+    return after, min(limit, MAX_PAGE_SIZE)
+
+# Helper function to run a list query one page at a time, newest id first.
+# Seeks past the last id seen instead of using OFFSET, so every page costs the same.
+def paginate_stolen(query, after, limit):
+    if after is not None:
+        query = query.where(StolenPost.id < after)
+    query = query.order_by(StolenPost.id.desc()).limit(limit)
+
+    items = [row._asdict() for row in db.session.execute(query)]
+    return {'items': items, 'next': items[-1]['id'] if len(items) == limit else None}
+
+# Upload a large image as a raw request body (application/octet-stream), bypassing multipart parsing.
+# The body is written to disk in 1MB chunks; the returned filename is then sent with the post's form data.
+@stolen_bp.route('/stolen/upload-stream', methods=['POST'])
+@jwt_required()
+def upload_stolen_image_stream():
+    try:
+        if request.mimetype != 'application/octet-stream':
+            return jsonify({'message': 'Content-Type must be application/octet-stream'}), 415
+        filename = request.args.get('filename', '')  # Only its extension is kept
+        if not filename:
+            return jsonify({'message': 'Filename is required'}), 400
+        if not request.content_length:
+            return jsonify({'message': 'Image data is required'}), 400
+
+        image_filename = save_image_stream(request.stream, filename, current_app.upload_dir)
+        return jsonify({'message': 'Image uploaded successfully', 'image': image_filename}), 201
+    except Exception as e:
+        return jsonify({'message': f'An error occurred: {str(e)}'}), 500
 
 # Helper function to validate post data
 def validate_post_data(data):
@@ -47,7 +118,12 @@ def create_stolen_post():
         # Save the image if it exists
         image_filename = None
         if image:
-            image_filename = save_image(image)
+            image_filename = save_image(image, current_app.upload_dir)
+        elif data.get('image'):
+            # Image sent beforehand through the upload-stream route
+            image_filename = secure_filename(data['image'])
+            if not os.path.exists(os.path.join(current_app.upload_dir, image_filename)):
+                return jsonify({'message': 'Image not found'}), 400
 
         # Get the current user from the JWT
         user_id = get_jwt_identity()
@@ -76,9 +152,39 @@ def create_stolen_post():
 @stolen_bp.route('/stolen', methods=['GET'])
 def get_all_stolen_posts():
     try:
-        posts = StolenPost.query.all()
-        posts_data = [
-            {
+        try:
+            after, limit = parse_stolen_page_args(request.args)
+        except ValueError:
+            return jsonify({'message': 'Invalid pagination parameters'}), 400
+
+        cache_key = f'stolen_all_{get_stolen_version()}_{after}_{limit}'
+        posts_data = cache_get(cache_key)
+        if posts_data is None:
+            # One query with the author joined in; rows become dicts without building ORM objects
+            posts_data = paginate_stolen(stolen_list_query(), after, limit)
+            cache_set(cache_key, posts_data, timeout=60)
+
+        # Let browsers and CDNs reuse the list briefly and revalidate it with If-None-Match
+        response = json_response(posts_data)
+        response.headers['Cache-Control'] = 'public, max-age=30'
+        response.add_etag()
+        return response.make_conditional(request)
+    except Exception as e:
+        return jsonify({'message': f'An error occurred: {str(e)}'}), 500
+
+# Get a specific Stolen Post by ID
+@stolen_bp.route('/stolen/<int:post_id>', methods=['GET'])
+def get_stolen_post(post_id):
+    try:
+        cache_key = f'stolen_post_{post_id}_{get_stolen_version()}'
+        post_data = cache_get(cache_key)
+        if post_data is None:
+            post = StolenPost.query.options(undefer_group('long')).get(post_id)
+
+            if not post:
+                return jsonify({'message': 'Post not found'}), 404
+
+            post_data = {
                 'id': post.id,
                 'description': post.description,
                 'location': post.location,
@@ -88,31 +194,8 @@ def get_all_stolen_posts():
                 'date_posted': post.date_posted,
                 'username': post.user.username
             }
-            for post in posts
-        ]
-        return jsonify(posts_data), 200
-    except Exception as e:
-        return jsonify({'message': f'An error occurred: {str(e)}'}), 500
-
-# Get a specific Stolen Post by ID
-@stolen_bp.route('/stolen/<int:post_id>', methods=['GET'])
-def get_stolen_post(post_id):
-    try:
-        post = StolenPost.query.get(post_id)
+            cache_set(cache_key, post_data, timeout=60)
 
-        if not post:
-            return jsonify({'message': 'Post not found'}), 404
-
-        post_data = {
-            'id': post.id,
-            'description': post.description,
-            'location': post.location,
-            'contact_info': post.contact_info,
-            'vehicle_details': post.vehicle_details,  # Include vehicle details
-            'image': post.image,
-            'date_posted': post.date_posted,
-            'username': post.user.username
-        }
         return jsonify(post_data), 200
     except Exception as e:
         return jsonify({'message': f'An error occurred: {str(e)}'}), 500
@@ -124,29 +207,24 @@ def search_stolen_posts():
         # Get query parameters
         keyword = request.args.get('keyword', '').lower()
         location = request.args.get('location', '').lower()
-
-        # Search for posts based on keyword and location
-        query = StolenPost.query
-        if keyword:
-            query = query.filter(StolenPost.description.ilike(f'%{keyword}%'))
+        mode = request.args.get('mode')  # 'fts' for stemmed, multi-word full-text search (PostgreSQL)
+        try:
+            after, limit = parse_stolen_page_args(request.args)
+        except ValueError:
+            return jsonify({'message': 'Invalid pagination parameters'}), 400
+
+        # Search for posts based on keyword and location.
+        # lower(column) LIKE matches the expression of the posts trigram indexes, so PostgreSQL can use them.
+        query = stolen_list_query()
+        if keyword and mode == 'fts' and db.engine.dialect.name == 'postgresql':
+            # Served by the GIN index on posts.search_vector
+            query = query.where(post_search_vector.op('@@')(func.websearch_to_tsquery('english', keyword)))
+        elif keyword:
+            query = query.where(func.lower(StolenPost.description).like(f'%{keyword}%'))
         if location:
-            query = query.filter(StolenPost.location.ilike(f'%{location}%'))
+            query = query.where(func.lower(StolenPost.location).like(f'%{location}%'))
 
-        posts = query.all()
-        posts_data = [
-            {
-                'id': post.id,
-                'description': post.description,
-                'location': post.location,
-                'contact_info': post.contact_info,
-                'vehicle_details': post.vehicle_details,  # Include vehicle details
-                'image': post.image,
-                'date_posted': post.date_posted,
-                'username': post.user.username
-            }
-            for post in posts
-        ]
-        return jsonify(posts_data), 200
+        return json_response(paginate_stolen(query, after, limit))
     except Exception as e:
         return jsonify({'message': f'An error occurred: {str(e)}'}), 500
 
@@ -155,7 +233,7 @@ def search_stolen_posts():
 @jwt_required()
 def update_stolen_post(post_id):
     try:
-        post = StolenPost.query.get(post_id)
+        post = StolenPost.query.options(undefer_group('long')).get(post_id)
 
         if not post:
             return jsonify({'message': 'Post not found'}), 404
@@ -180,7 +258,13 @@ def update_stolen_post(post_id):
 
         # If a new image is uploaded, save it and update the image field
         if image:
-            image_filename = save_image(image)
+            image_filename = save_image(image, current_app.upload_dir)
+            post.image = image_filename
+        elif data.get('image'):
+            # Image sent beforehand through the upload-stream route
+            image_filename = secure_filename(data['image'])
+            if not os.path.exists(os.path.join(current_app.upload_dir, image_filename)):
+                return jsonify({'message': 'Image not found'}), 400
             post.image = image_filename
 
         db.session.commit()
@@ -220,13 +304,12 @@ def add_comment(post_id):
             return jsonify({'message': 'Comment content is required'}), 400
 
         user_id = get_jwt_identity()
-        user = User.query.get(user_id)
 
         post = StolenPost.query.get(post_id)
         if not post:
             return jsonify({'message': 'Post not found'}), 404
 
-        comment = Comment(content=content, user_id=user.id, post_id=post.id)
+        comment = Comment(content=content, user_id=user_id, post_id=post.id)
         db.session.add(comment)
         db.session.commit()
 
@@ -238,21 +321,28 @@ def add_comment(post_id):
 @stolen_bp.route('/stolen/<int:post_id>/comments', methods=['GET'])
 def get_comments(post_id):
     try:
-        post = StolenPost.query.get(post_id)
-
-        if not post:
-            return jsonify({'message': 'Post not found'}), 404
-
-        comments = Comment.query.filter_by(post_id=post_id).all()
-        comments_data = [
-            {
-                'id': comment.id,
-                'content': comment.content,
-                'date_posted': comment.date_posted,
-                'username': comment.user.username
-            }
-            for comment in comments
-        ]
+        cache_key = f'stolen_comments_{post_id}_{get_stolen_version()}'
+        comments_data = cache_get(cache_key)
+        if comments_data is None:
+            post = StolenPost.query.get(post_id)
+
+            if not post:
+                return jsonify({'message': 'Post not found'}), 404
+
+            # lambda_stmt builds the statement once and afterwards only rebinds post_id
+            comments = db.session.execute(lambda_stmt(
+                lambda: select(Comment).options(selectinload(Comment.user), raiseload('*')).where(Comment.post_id == post_id)
+            )).scalars().all()
+            comments_data = [
+                {
+                    'id': comment.id,
+                    'content': comment.content,
+                    'date_posted': comment.date_posted,
+                    'username': comment.user.username
+                }
+                for comment in comments
+            ]
+            cache_set(cache_key, comments_data, timeout=60)
 
         return jsonify(comments_data), 200
     except Exception as e:
@@ -0,0 +1,24 @@
+from flask import Blueprint, current_app, send_from_directory, abort
+from werkzeug.utils import secure_filename
+import mimetypes
+
+# Define the blueprint serving uploaded images for every post type
+uploads_bp = Blueprint('uploads', __name__)
+
+# Serve uploaded images.
+# In production nginx sends the file itself; Flask only answers with an X-Accel-Redirect header, e.g.
+#   location /protected_uploads/ { internal; alias /var/uploads/; }
+@uploads_bp.route('/uploads/<filename>')
+def uploaded_file(filename):
+    # Stored names are always secure_filename() output; anything else (e.g. '..') is not an upload
+    if secure_filename(filename) != filename:
+        abort(404)
+
+    accel_prefix = current_app.config.get('UPLOADS_ACCEL_REDIRECT')
+    if accel_prefix:
+        response = current_app.response_class()
+        response.headers['X-Accel-Redirect'] = f"{accel_prefix.rstrip('/')}/{filename}"
+        response.headers['Content-Type'] = mimetypes.guess_type(filename)[0] or 'application/octet-stream'
+        return response
+
+    return send_from_directory(current_app.upload_dir, filename)
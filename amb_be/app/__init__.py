@@ -1,5 +1,9 @@
-import os
-from flask import Flask
+import sqlite3
+from pathlib import Path
+import orjson
+from tempfile import SpooledTemporaryFile, TemporaryFile
+from flask import Flask, Request, current_app
+from flask.json.provider import JSONProvider
 from flask_sqlalchemy import SQLAlchemy
 from flask_jwt_extended import JWTManager
 from flask_wtf.csrf import CSRFProtect
@@ -8,22 +12,96 @@ from flask_socketio import SocketIO
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
 from flask_migrate import Migrate
+from flask_caching import Cache
+from flask_compress import Compress
+from sqlalchemy import event, text as sql_text
+from sqlalchemy.engine import Engine
 from config import Config
 
 # Initialize extensions
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'expire_on_commit': False})  # Objects stay readable after commit without a refresh SELECT
 jwt = JWTManager()
 csrf = CSRFProtect()
 mail = Mail()
 socketio = SocketIO()
 limiter = Limiter(key_func=get_remote_address)
 migrate = Migrate()
+cache = Cache()
+compress = Compress()
+
+# SQLite ignores foreign keys (and ON DELETE CASCADE) unless enabled on each connection
+@event.listens_for(Engine, 'connect')
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute('PRAGMA foreign_keys=ON')
+        cursor.close()
+
+# Request class that bounds how much of a multipart upload is held in memory
+class AmberRequest(Request):
+    @property
+    def max_form_memory_size(self):
+        return current_app.config['MAX_FORM_MEMORY_SIZE']
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Large uploads go straight to a temp file on disk instead of filling a memory buffer first
+        spool_max_size = current_app.config['UPLOAD_SPOOL_MAX_SIZE']
+        if total_content_length is None or total_content_length > spool_max_size:
+            return TemporaryFile(mode='rb+')
+        # Small ones stay in memory
+        return SpooledTemporaryFile(max_size=spool_max_size, mode='rb+')
+
+# JSON provider backed by orjson; datetimes are serialized natively as ISO 8601 strings
+class ORJSONProvider(JSONProvider):
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=str).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+# Build a JSON response straight from orjson bytes, without jsonify's intermediate str
+def json_response(obj, status=200):
+    return current_app.response_class(orjson.dumps(obj, default=str), status=status, mimetype='application/json')
+
+# Helper functions for the shared response cache. Cache backend errors (e.g. Redis unreachable) are logged
+# and treated as a miss, so requests fall back to the database instead of failing.
+def cache_get(key):
+    try:
+        return cache.get(key)
+    except Exception:
+        current_app.logger.exception(f'Cache read failed for {key}')
+        return None
+
+def cache_set(key, value, timeout=None):
+    try:
+        return cache.set(key, value, timeout=timeout)
+    except Exception:
+        current_app.logger.exception(f'Cache write failed for {key}')
+        return False
+
+def cache_delete(*keys):
+    try:
+        return cache.delete_many(*keys)
+    except Exception:
+        current_app.logger.exception(f'Cache delete failed for {keys}')
+        return False
 
 def create_app(config_class=Config):
     # Initialize Flask app
     app = Flask(__name__)
+    app.request_class = AmberRequest
+    app.json = ORJSONProvider(app)
     app.config.from_object(config_class)
 
+    # Resolve the upload directory once; routes and blueprints reuse this absolute path
+    app.upload_dir = Path(app.config['UPLOAD_FOLDER']).resolve()
+    app.upload_dir.mkdir(parents=True, exist_ok=True)
+
+    # Make psycopg2 cooperative under gevent workers before the engine is created
+    if app.config.get('GEVENT_WORKERS'):
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
+
     # Initialize extensions with the app
     db.init_app(app)
     jwt.init_app(app)
@@ -32,10 +110,12 @@ def create_app(config_class=Config):
     socketio.init_app(app)
     limiter.init_app(app)
     migrate.init_app(app, db)
+    cache.init_app(app)
+    compress.init_app(app)
 
     # Import and register blueprints
     from app.users import users_bp
-    from app.posts_respo_alert import found_bp, lost_bp, looking_bp, stolen_bp
+    from app.posts_respo_alert import found_bp, lost_bp, looking_bp, stolen_bp, uploads_bp, posts_bp
     from app.admins import admins_bp
 
     app.register_blueprint(users_bp, url_prefix='/api/users')
@@ -43,8 +123,18 @@ def create_app(config_class=Config):
     app.register_blueprint(lost_bp, url_prefix='/api')
     app.register_blueprint(looking_bp, url_prefix='/api')
     app.register_blueprint(stolen_bp, url_prefix='/api')
+    app.register_blueprint(uploads_bp, url_prefix='/api')
+    app.register_blueprint(posts_bp, url_prefix='/api')
     app.register_blueprint(admins_bp, url_prefix='/api/admin')
 
+    # Rebuild the admin dashboard's daily_activity view (PostgreSQL); run it every few minutes from cron
+    @app.cli.command('refresh-activity')
+    def refresh_activity():
+        if db.engine.dialect.name != 'postgresql':
+            return
+        db.session.execute(sql_text('REFRESH MATERIALIZED VIEW CONCURRENTLY daily_activity'))
+        db.session.commit()
+
     # Enforce HTTPS in production
     if not app.debug and not app.testing:
         from werkzeug.middleware.proxy_fix import ProxyFix
@@ -55,16 +145,7 @@ def create_app(config_class=Config):
             if not request.is_secure:
                 return redirect(request.url.replace("http://", "https://"))
 
-    # Set up logging for production
-    if not app.debug and not app.testing:
-        import logging
-        from logging.handlers import RotatingFileHandler
-        if not os.path.exists('logs'):
-            os.mkdir('logs')
-        file_handler = RotatingFileHandler('logs/amber.log', maxBytes=10240, backupCount=10)
-        file_handler.setLevel(logging.INFO)
-        app.logger.addHandler(file_handler)
-        app.logger.info('Amber startup')
+    # File logging for production is set up in run.py, through a queue listener thread
 
     return app
 
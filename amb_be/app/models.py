@@ -1,12 +1,79 @@
 from datetime import datetime, timedelta
-from flask_sqlalchemy import SQLAlchemy
 from flask import current_app
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import event, DDL, table, column, text
+from werkzeug.security import check_password_hash
+from argon2 import PasswordHasher
+from argon2.exceptions import VerifyMismatchError, InvalidHashError
 from flask_jwt_extended import create_access_token
 import jwt
 from time import time
+from concurrent.futures import ThreadPoolExecutor
+import os
+from app import db
 
-db = SQLAlchemy()
+# Argon2id hashers for user passwords (argon2-cffi, native code), one per cost setting
+_password_hashers = {}
+
+# Helper function returning the hasher for the app's configured password hashing costs
+def get_password_hasher():
+    costs = (current_app.config['PASSWORD_HASH_TIME_COST'], current_app.config['PASSWORD_HASH_MEMORY_COST'])
+    if costs not in _password_hashers:
+        _password_hashers[costs] = PasswordHasher(time_cost=costs[0], memory_cost=costs[1], parallelism=1)
+    return _password_hashers[costs]
+
+# Real OS threads for password hashing under gevent workers, one per CPU core; created on first use,
+# after the worker process has forked (gevent's shared hub threadpool also serves DNS lookups)
+_gevent_hashing_pool = None
+
+# Helper function returning this worker's gevent hashing threadpool
+def get_gevent_hashing_pool():
+    global _gevent_hashing_pool
+    if _gevent_hashing_pool is None:
+        from gevent.threadpool import ThreadPool
+        _gevent_hashing_pool = ThreadPool(os.cpu_count())
+    return _gevent_hashing_pool
+
+# Helper function to run password hashing on a real OS thread under gevent workers, so other greenlets
+# keep being served while it runs (argon2-cffi releases the GIL); threaded workers just run it inline
+def run_password_hashing(func, *args):
+    if current_app.config.get('GEVENT_WORKERS'):
+        return get_gevent_hashing_pool().apply(func, args)
+    return func(*args)
+
+# Threads for hashing a batch of passwords in parallel (argon2-cffi releases the GIL while hashing)
+_hashing_executor = ThreadPoolExecutor(max_workers=os.cpu_count())
+
+# Helper function to hash several passwords at once, spread over all CPU cores
+def hash_passwords(passwords):
+    password_hasher = get_password_hasher()
+    if current_app.config.get('GEVENT_WORKERS'):
+        return get_gevent_hashing_pool().map(password_hasher.hash, passwords)
+    return list(_hashing_executor.map(password_hasher.hash, passwords))
+
+# Argon2 hash of a throwaway password per hasher, verified when a login names no account
+_dummy_password_hashes = {}
+
+# Helper function spending the same hashing work as a real password check, for logins with an unknown email,
+# so response time doesn't reveal which emails are registered
+def check_password_for_missing_user(password):
+    password_hasher = get_password_hasher()
+    if password_hasher not in _dummy_password_hashes:
+        _dummy_password_hashes[password_hasher] = password_hasher.hash('dummy-password')
+    try:
+        run_password_hashing(password_hasher.verify, _dummy_password_hashes[password_hasher], password)
+    except VerifyMismatchError:
+        pass
+    return False
+
+# HMAC keys for password reset tokens, encoded once per SECRET_KEY
+_reset_token_keys = {}
+
+# Helper function returning the reset token signing key as bytes, ready for PyJWT
+def get_reset_token_key():
+    secret = current_app.config['SECRET_KEY']
+    if secret not in _reset_token_keys:
+        _reset_token_keys[secret] = secret.encode()
+    return _reset_token_keys[secret]
 
 # User Model
 class User(db.Model):
@@ -19,35 +86,56 @@ class User(db.Model):
     is_admin = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
 
-    # Relationships
-    posts = db.relationship('Post', backref='user', lazy=True)
-    comments = db.relationship('Comment', backref='user', lazy=True)
-    written_reviews = db.relationship('Review', foreign_keys='Review.user_id', backref='reviewer', lazy=True)
-    received_reviews = db.relationship('Review', foreign_keys='Review.reviewed_user_id', backref='reviewed_user', lazy=True)
+    # Partial index on the few admin rows (PostgreSQL; a plain index elsewhere)
+    __table_args__ = (
+        db.Index('ix_users_is_admin', is_admin, postgresql_where=is_admin),
+    )
+
+    # Relationships (each side declares its loader strategy; 'selectin' where the related row is almost always read)
+    posts = db.relationship('Post', back_populates='user', lazy='select')
+    comments = db.relationship('Comment', back_populates='user', lazy='select')
+    written_reviews = db.relationship('Review', foreign_keys='Review.user_id', back_populates='reviewer', lazy='select')
+    received_reviews = db.relationship('Review', foreign_keys='Review.reviewed_user_id', back_populates='reviewed_user', lazy='select')
 
     # Password hashing
     def set_password(self, password):
-        self.password_hash = generate_password_hash(password)
+        self.password_hash = run_password_hashing(get_password_hasher().hash, password)
 
+    # On success, an outdated hash is replaced in place; the caller commits it
     def check_password(self, password):
-        return check_password_hash(self.password_hash, password)
+        password_hasher = get_password_hasher()
+        try:
+            run_password_hashing(password_hasher.verify, self.password_hash, password)
+        except VerifyMismatchError:
+            return False
+        except InvalidHashError:
+            # Werkzeug PBKDF2 hash from before the switch to Argon2id
+            if not check_password_hash(self.password_hash, password):
+                return False
+            self.set_password(password)
+            return True
+
+        if password_hasher.check_needs_rehash(self.password_hash):
+            self.set_password(password)
+        return True
 
     # Generate JWT access token
     def generate_jwt(self, expires_in=3600):
-        return create_access_token(identity=self.id, expires_delta=timedelta(seconds=expires_in))
+        return create_access_token(identity=self.id, expires_delta=timedelta(seconds=expires_in),
+                                   additional_claims={'is_admin': self.is_admin})
 
     # Generate password reset token
     def get_reset_token(self, expires_in=600):
         return jwt.encode({'reset_password': self.id, 'exp': time() + expires_in}, 
-                          current_app.config['SECRET_KEY'], algorithm='HS256')
+                          get_reset_token_key(), algorithm='HS256')
 
     @staticmethod
     def verify_reset_token(token):
         try:
-            user_id = jwt.decode(token, current_app.config['SECRET_KEY'], algorithms=['HS256'])['reset_password']
+            user_id = jwt.decode(token, get_reset_token_key(), algorithms=['HS256'])['reset_password']
         except:
             return None
-        return User.query.get(user_id)
+        return db.session.get(User, user_id)
 
     def __repr__(self):
         return f'<User {self.username}>'
@@ -62,7 +150,7 @@ class Post(db.Model):
     contact_info = db.Column(db.String(255), nullable=False)
     date_posted = db.Column(db.DateTime, default=datetime.utcnow)
     post_type = db.Column(db.String(50))  # For polymorphic identity
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # Indexed by ix_posts_user_date
     image = db.Column(db.String(255), nullable=True)  # To store image filename
 
     __mapper_args__ = {
@@ -70,14 +158,48 @@ class Post(db.Model):
         'polymorphic_on': post_type
     }
 
-    comments = db.relationship('Comment', backref='post', lazy=True)
+    # Trigram indexes so the search endpoints' lower(...) ILIKE '%kw%' filters are index-backed on PostgreSQL
+    __table_args__ = (
+        db.Index('ix_posts_description_trgm', db.func.lower(description).label('lower_description'),
+                 postgresql_using='gin', postgresql_ops={'lower_description': 'gin_trgm_ops'}),
+        db.Index('ix_posts_location_trgm', db.func.lower(location).label('lower_location'),
+                 postgresql_using='gin', postgresql_ops={'lower_location': 'gin_trgm_ops'}),
+        # Serves the newest-first keyset pagination of the list and search endpoints
+        db.Index('ix_posts_date_posted_id', date_posted.desc(), id.desc()),
+        # Serves a user's posts in date order (admin activity) and plain user_id lookups
+        db.Index('ix_posts_user_date', user_id, date_posted),
+    )
+
+    # Long text columns stay out of ORM loads until read, or until a query undefers the 'long' group
+    description = db.deferred(description, group='long')
+    contact_info = db.deferred(contact_info, group='long')
+
+    user = db.relationship('User', back_populates='posts', lazy='selectin')
+    comments = db.relationship('Comment', back_populates='post', lazy='select',
+                               cascade='all, delete-orphan', passive_deletes=True)  # The database cascades the delete
 
     def __repr__(self):
         return f'<Post {self.id}, Type: {self.post_type}>'
 
+# The trigram indexes above need the pg_trgm extension
+event.listen(Post.__table__, 'before_create',
+             DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+# Full-text search vector over description and location, kept up to date by PostgreSQL itself.
+# It is not mapped on Post so SQLite databases keep working; query it through post_search_vector.
+event.listen(Post.__table__, 'after_create', DDL(
+    "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+    "(to_tsvector('english', coalesce(description, '') || ' ' || coalesce(location, ''))) STORED"
+).execute_if(dialect='postgresql'))
+event.listen(Post.__table__, 'after_create', DDL(
+    'CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)'
+).execute_if(dialect='postgresql'))
+
+post_search_vector = db.literal_column('posts.search_vector')
+
 # Found Post Model (inherits from Post)
 class FoundPost(Post):
-    id = db.Column(db.Integer, db.ForeignKey('posts.id'), primary_key=True)
+    id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
 
     __mapper_args__ = {
         'polymorphic_identity': 'found'
@@ -85,7 +207,7 @@ class FoundPost(Post):
 
 # Lost Post Model (inherits from Post)
 class LostPost(Post):
-    id = db.Column(db.Integer, db.ForeignKey('posts.id'), primary_key=True)
+    id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
 
     __mapper_args__ = {
         'polymorphic_identity': 'lost'
@@ -93,7 +215,7 @@ class LostPost(Post):
 
 # Looking Post Model (inherits from Post)
 class LookingPost(Post):
-    id = db.Column(db.Integer, db.ForeignKey('posts.id'), primary_key=True)
+    id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
 
     __mapper_args__ = {
         'polymorphic_identity': 'looking'
@@ -101,8 +223,8 @@ class LookingPost(Post):
 
 # Stolen Post Model (inherits from Post)
 class StolenPost(Post):
-    id = db.Column(db.Integer, db.ForeignKey('posts.id'), primary_key=True)
-    vehicle_details = db.Column(db.String(255), nullable=True)  # Additional field for vehicle info
+    id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), primary_key=True)
+    vehicle_details = db.deferred(db.Column(db.String(255), nullable=True), group='long')  # Additional field for vehicle info
 
     __mapper_args__ = {
         'polymorphic_identity': 'stolen'
@@ -115,8 +237,11 @@ class Comment(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     content = db.Column(db.String(255), nullable=False)
     date_posted = db.Column(db.DateTime, default=datetime.utcnow)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)
-    post_id = db.Column(db.Integer, db.ForeignKey('posts.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)
+    post_id = db.Column(db.Integer, db.ForeignKey('posts.id', ondelete='CASCADE'), nullable=False, index=True)
+
+    user = db.relationship('User', back_populates='comments', lazy='selectin')
+    post = db.relationship('Post', back_populates='comments', lazy='select')
 
     def __repr__(self):
         return f'<Comment {self.id} on Post {self.post_id}>'
@@ -128,11 +253,37 @@ class Review(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     rating = db.Column(db.Integer, nullable=False)  # Rating between 1 and 5
     review = db.Column(db.String(255), nullable=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # Reviewer
-    reviewed_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False)  # The person being reviewed
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)  # Reviewer
+    reviewed_user_id = db.Column(db.Integer, db.ForeignKey('users.id'), nullable=False, index=True)  # The person being reviewed
 
-    reviewer = db.relationship('User', foreign_keys=[user_id], backref='written_reviews')
-    reviewed_user = db.relationship('User', foreign_keys=[reviewed_user_id], backref='received_reviews')
+    reviewer = db.relationship('User', foreign_keys=[user_id], back_populates='written_reviews', lazy='select')
+    reviewed_user = db.relationship('User', foreign_keys=[reviewed_user_id], back_populates='received_reviews', lazy='select')
 
     def __repr__(self):
         return f'<Review {self.id} - Rating: {self.rating}>'
+
+# Per-user daily post and comment counts behind the admin dashboard
+DAILY_ACTIVITY_QUERY = (
+    "SELECT 'posts' AS kind, date(date_posted) AS day, user_id, count(*) AS total FROM posts GROUP BY 2, 3 "
+    "UNION ALL "
+    "SELECT 'comments', date(date_posted), user_id, count(*) FROM comments GROUP BY 2, 3"
+)
+
+# On PostgreSQL the counts are precomputed in a materialized view, refreshed with `flask refresh-activity`.
+# The unique index is what allows REFRESH MATERIALIZED VIEW CONCURRENTLY.
+event.listen(db.metadata, 'after_create', DDL(
+    f'CREATE MATERIALIZED VIEW IF NOT EXISTS daily_activity AS {DAILY_ACTIVITY_QUERY}'
+).execute_if(dialect='postgresql'))
+event.listen(db.metadata, 'after_create', DDL(
+    'CREATE UNIQUE INDEX IF NOT EXISTS ix_daily_activity_kind_day_user ON daily_activity (kind, day, user_id)'
+).execute_if(dialect='postgresql'))
+event.listen(db.metadata, 'before_drop', DDL(
+    'DROP MATERIALIZED VIEW IF EXISTS daily_activity'
+).execute_if(dialect='postgresql'))
+
+# Helper function returning the daily activity rows: the materialized view on PostgreSQL, computed live elsewhere
+def daily_activity_source():
+    columns = (column('kind'), column('day'), column('user_id'), column('total'))
+    if db.engine.dialect.name == 'postgresql':
+        return table('daily_activity', *columns)
+    return text(DAILY_ACTIVITY_QUERY).columns(*columns).subquery('daily_activity')
@@ -1,64 +1,70 @@
 from flask import Blueprint, jsonify, request
-from flask_jwt_extended import jwt_required, get_jwt_identity
-from app.models import User, Post, Comment, Review, db
-from sqlalchemy import func
-from flask_limiter import Limiter
-from flask_limiter.util import get_remote_address
+from app.models import User, Post, Comment, Review, db, daily_activity_source
+from sqlalchemy import func, select
+from sqlalchemy.orm import raiseload, load_only, undefer
+from app import limiter
+from app.users.users import forget_email_lookup
+from app.users.auth import admin_required
 
 # Define the Blueprint for admins
 admins_bp = Blueprint('admins', __name__)
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
-
-# Helper function to check if the user is an admin
-def is_admin(user_id):
-    user = User.query.get(user_id)
-    return user.is_admin if user else False
+# Helper function returning the engine for read-only dashboard queries: the read replica when configured
+def analytics_bind():
+    return {'bind': db.engines.get('replica', db.engine)}
 
 # Admin: View user analytics (number of users, posts, comments, etc.)
 @admins_bp.route('/analytics', methods=['GET'])
-@jwt_required()
+@admin_required
 def admin_analytics():
-    current_user_id = get_jwt_identity()
-
-    # Ensure only admins can access this route
-    if not is_admin(current_user_id):
-        return jsonify({'message': 'Admin access required'}), 403
-
     try:
+        # Dashboard reads go to the read replica (if any) so they don't contend with writes
+        bind = analytics_bind()
+
         # Total numbers
-        total_users = User.query.count()
-        total_posts = Post.query.count()
-        total_comments = Comment.query.count()
+        total_users = db.session.scalar(select(func.count(User.id)), bind_arguments=bind)
+        total_posts = db.session.scalar(select(func.count(Post.id)), bind_arguments=bind)
+        total_comments = db.session.scalar(select(func.count(Comment.id)), bind_arguments=bind)
 
         # Users registered per day
-        users_per_day = db.session.query(
-            func.date(User.created_at).label('date'),
-            func.count(User.id).label('total')
-        ).group_by(func.date(User.created_at)).all()
-
-        # Posts created per day
-        posts_per_day = db.session.query(
-            func.date(Post.date_posted).label('date'),
-            func.count(Post.id).label('total')
-        ).group_by(func.date(Post.date_posted)).all()
-
-        # Comments created per day
-        comments_per_day = db.session.query(
-            func.date(Comment.date_posted).label('date'),
-            func.count(Comment.id).label('total')
-        ).group_by(func.date(Comment.date_posted)).all()
-
-        # Detailed user actions: actions grouped by user and date
-        user_activity = db.session.query(
-            User.username,
-            func.date(Post.date_posted).label('post_date'),
-            func.date(Comment.date_posted).label('comment_date'),
-            func.count(Post.id).label('total_posts'),
-            func.count(Comment.id).label('total_comments')
-        ).outerjoin(Post, Post.user_id == User.id).outerjoin(Comment, Comment.user_id == User.id)\
-            .group_by(User.username, func.date(Post.date_posted), func.date(Comment.date_posted)).all()
+        users_per_day = db.session.execute(
+            select(
+                func.date(User.created_at).label('date'),
+                func.count(User.id).label('total')
+            ).group_by(func.date(User.created_at)),
+            bind_arguments=bind
+        ).all()
+
+        # Posts and comments per user and day, read in one pass over the daily_activity view.
+        # Posts and comments are counted separately, so neither is multiplied by the other.
+        activity = daily_activity_source()
+        activity_rows = db.session.execute(
+            select(activity.c.kind, activity.c.day, activity.c.total, User.username)
+            .join(User, User.id == activity.c.user_id),
+            bind_arguments=bind
+        ).all()
+
+        posts_per_day = {}
+        comments_per_day = {}
+        user_activity = {}
+        for row in activity_rows:
+            day = str(row.day)
+            per_day = posts_per_day if row.kind == 'posts' else comments_per_day
+            per_day[day] = per_day.get(day, 0) + row.total
+
+            entry = user_activity.setdefault((row.username, day), {
+                'username': row.username,
+                'post_date': None,
+                'comment_date': None,
+                'total_posts': 0,
+                'total_comments': 0
+            })
+            if row.kind == 'posts':
+                entry['post_date'] = day
+                entry['total_posts'] = row.total
+            else:
+                entry['comment_date'] = day
+                entry['total_comments'] = row.total
 
         # Build the analytics response
         analytics = {
@@ -66,18 +72,9 @@ def admin_analytics():
             'total_posts': total_posts,
             'total_comments': total_comments,
             'users_per_day': [{'date': str(u.date), 'total': u.total} for u in users_per_day],
-            'posts_per_day': [{'date': str(p.date), 'total': p.total} for p in posts_per_day],
-            'comments_per_day': [{'date': str(c.date), 'total': c.total} for c in comments_per_day],
-            'user_activity': [
-                {
-                    'username': ua.username,
-                    'post_date': str(ua.post_date) if ua.post_date else None,
-                    'comment_date': str(ua.comment_date) if ua.comment_date else None,
-                    'total_posts': ua.total_posts,
-                    'total_comments': ua.total_comments
-                }
-                for ua in user_activity
-            ]
+            'posts_per_day': [{'date': day, 'total': total} for day, total in sorted(posts_per_day.items())],
+            'comments_per_day': [{'date': day, 'total': total} for day, total in sorted(comments_per_day.items())],
+            'user_activity': [user_activity[key] for key in sorted(user_activity)]
         }
 
         return jsonify(analytics), 200
@@ -87,16 +84,10 @@ def admin_analytics():
 
 # Admin: Get all users
 @admins_bp.route('/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_users():
-    current_user_id = get_jwt_identity()
-
-    # Ensure only admins can access this route
-    if not is_admin(current_user_id):
-        return jsonify({'message': 'Admin access required'}), 403
-
     try:
-        users = User.query.all()
+        users = User.query.options(load_only(User.id, User.username, User.email, User.is_admin, User.created_at)).all()
         users_data = [
             {
                 'id': user.id,
@@ -114,16 +105,10 @@ def get_all_users():
         return jsonify({'message': f'An error occurred: {str(e)}'}), 500
 
 # Admin: Create a new user
-@limiter.limit("5 per minute")  # Limit to 5 requests per minute
 @admins_bp.route('/users', methods=['POST'])
-@jwt_required()
+@limiter.limit("5 per minute")  # Limit to 5 requests per minute
+@admin_required
 def create_user():
-    current_user_id = get_jwt_identity()
-
-    # Ensure only admins can access this route
-    if not is_admin(current_user_id):
-        return jsonify({'message': 'Admin access required'}), 403
-
     data = request.get_json()
     if not data or not data.get('email') or not data.get('password'):
         return jsonify({'message': 'Email and password are required'}), 400
@@ -131,65 +116,52 @@ def create_user():
     if User.query.filter_by(email=data['email']).first():
         return jsonify({'message': 'Email already registered'}), 400
 
-    hashed_password = generate_password_hash(data['password'])
-    new_user = User(email=data['email'], username=data.get('username'), password_hash=hashed_password, is_admin=data.get('is_admin', False))
+    new_user = User(email=data['email'], username=data.get('username'), is_admin=data.get('is_admin', False))
+    new_user.set_password(data['password'])
     db.session.add(new_user)
     db.session.commit()
+    forget_email_lookup(new_user.email)
 
     return jsonify({'message': 'User created successfully'}), 201
 
 # Admin: Update a user
 @admins_bp.route('/users/<int:user_id>', methods=['PUT'])
-@jwt_required()
+@admin_required
 def update_user(user_id):
-    current_user_id = get_jwt_identity()
-
-    # Ensure only admins can access this route
-    if not is_admin(current_user_id):
-        return jsonify({'message': 'Admin access required'}), 403
-
     user = User.query.get(user_id)
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
     data = request.get_json()
+    previous_email = user.email
     user.username = data.get('username', user.username)
     user.email = data.get('email', user.email)
     user.is_admin = data.get('is_admin', user.is_admin)
 
     db.session.commit()
+    forget_email_lookup(previous_email)
+    forget_email_lookup(user.email)
 
     return jsonify({'message': 'User updated successfully'}), 200
 
 # Admin: Delete a user
 @admins_bp.route('/users/<int:user_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_user(user_id):
-    current_user_id = get_jwt_identity()
-
-    # Ensure only admins can access this route
-    if not is_admin(current_user_id):
-        return jsonify({'message': 'Admin access required'}), 403
-
     user = User.query.get(user_id)
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
     db.session.delete(user)
     db.session.commit()
+    forget_email_lookup(user.email)
 
     return jsonify({'message': 'User deleted successfully'}), 200
 
 # Admin: Get a specific user by ID
 @admins_bp.route('/users/<int:user_id>', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_user(user_id):
-    current_user_id = get_jwt_identity()
-
-    # Ensure only admins can access this route
-    if not is_admin(current_user_id):
-        return jsonify({'message': 'Admin access required'}), 403
-
     user = User.query.get(user_id)
     if not user:
         return jsonify({'message': 'User not found'}), 404
@@ -206,20 +178,15 @@ def get_user(user_id):
 
 # Admin: View detailed activity logs for a specific user (e.g., posts, comments)
 @admins_bp.route('/users/<int:user_id>/activity', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_user_activity(user_id):
-    current_user_id = get_jwt_identity()
-
-    # Ensure only admins can access this route
-    if not is_admin(current_user_id):
-        return jsonify({'message': 'Admin access required'}), 403
-
     user = User.query.get(user_id)
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
-    posts = Post.query.filter_by(user_id=user.id).all()
-    comments = Comment.query.filter_by(user_id=user.id).all()
+    # Only columns are read below; raiseload('*') also skips the default selectin load of each author
+    posts = Post.query.options(undefer(Post.description), raiseload('*')).filter_by(user_id=user.id).all()
+    comments = Comment.query.options(raiseload('*')).filter_by(user_id=user.id).all()
 
     activity = {
         'posts': [{'id': post.id, 'description': post.description, 'date_posted': post.date_posted} for post in posts],
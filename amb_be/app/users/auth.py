@@ -0,0 +1,24 @@
+from flask import jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
+from app.models import User, db
+from sqlalchemy import select, lambda_stmt
+from functools import wraps
+
+# Helper function to check if the user is an admin
+def is_admin(user_id):
+    # Reads the single column as a scalar; no User row or ORM instance is built.
+    # lambda_stmt builds the statement once and afterwards only rebinds user_id.
+    return bool(db.session.scalar(lambda_stmt(lambda: select(User.is_admin).where(User.id == user_id))))
+
+# Decorator restricting a route to admins. The is_admin claim in the access token answers without a query;
+# tokens issued before the claim existed fall back to the database.
+def admin_required(view):
+    @wraps(view)
+    @jwt_required()
+    def wrapper(*args, **kwargs):
+        claims = get_jwt()
+        allowed = claims['is_admin'] if 'is_admin' in claims else is_admin(get_jwt_identity())
+        if not allowed:
+            return jsonify({'message': 'Admin access required'}), 403
+        return view(*args, **kwargs)
+    return wrapper
@@ -1,90 +1,211 @@
-from flask import Blueprint, request, jsonify
-from werkzeug.security import generate_password_hash, check_password_hash
+from flask import Blueprint, request, current_app
 from flask_jwt_extended import create_access_token, create_refresh_token, jwt_required, get_jwt_identity
 from flask_mail import Message
-from app import db, mail
-from app.models import User
-from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
+from app import db, mail, limiter, json_response
+from app.models import User, check_password_for_missing_user, hash_passwords
+from app.users.auth import admin_required
+from sqlalchemy import select, insert
+from sqlalchemy.orm import load_only
 import jwt
 from datetime import datetime, timedelta
-import os
+from concurrent.futures import ThreadPoolExecutor
+from cachetools import TTLCache
+import smtplib
+import threading
+import time
 
 # Define the Blueprint for users
 users_bp = Blueprint('users', __name__)
 
-# Rate limiting
-limiter = Limiter(key_func=get_remote_address)
+# Access tokens issued in the last 15 seconds, by identity and admin flag.
+# Bursts of logins/refreshes for the same user (client retries) reuse one signed token.
+_access_token_cache = TTLCache(maxsize=10000, ttl=15)
+_access_token_lock = threading.Lock()
+
+# Helper function to create, or reuse a just-issued, access token carrying the is_admin claim
+def cached_access_token(identity, is_admin):
+    key = (identity, is_admin)
+    with _access_token_lock:
+        token = _access_token_cache.get(key)
+    if token is None:
+        token = create_access_token(identity=identity, additional_claims={'is_admin': is_admin})
+        with _access_token_lock:
+            _access_token_cache[key] = token
+    return token
+
+# Recent email lookups for login and password reset: email -> user id, or None when there is no account.
+# Sprayed login attempts with unknown emails are answered from here for 5 seconds instead of the database.
+_email_lookup_cache = TTLCache(maxsize=1024, ttl=5)
+_email_lookup_lock = threading.Lock()
+
+# Helper function to find a user by email through the short-lived lookup cache
+def find_user_by_email(email):
+    with _email_lookup_lock:
+        cached = email in _email_lookup_cache
+        user_id = _email_lookup_cache.get(email)
+    if cached:
+        return db.session.get(User, user_id) if user_id is not None else None
+
+    user = User.query.filter_by(email=email).first()
+    with _email_lookup_lock:
+        _email_lookup_cache[email] = user.id if user else None
+    return user
+
+# Helper function keying the password reset limit on the requested email, so rotating IPs can't get around it
+def reset_email_rate_limit_key():
+    data = request.get_json(silent=True)
+    email = data.get('email') if isinstance(data, dict) else None
+    if not isinstance(email, str):
+        return f'resetpw-ip:{get_remote_address()}'  # Kept apart from the per-IP limit's own key
+    return f'resetpw:{email.strip().lower()}'
+
+# Helper function to drop a cached email lookup after an account is created, renamed or deleted
+def forget_email_lookup(email):
+    with _email_lookup_lock:
+        _email_lookup_cache.pop(email, None)
+
+# Columns returned by the user detail and listing endpoints (password_hash is never loaded for them)
+USER_PUBLIC_COLUMNS = (User.id, User.username, User.email, User.is_admin, User.created_at)
+
+# Page size for the admin user listing when ?limit= is absent, and the most one page may hold
+USERS_PAGE_DEFAULT = 100
+USERS_PAGE_MAX = 500
+
+# Most accounts one bulk creation request may hold
+BULK_USERS_MAX = 1000
+
+# Threads that deliver emails after the request has been answered
+_mail_executor = ThreadPoolExecutor(max_workers=4)
+
+# SMTP connection each mail thread keeps open and reuses (TCP, STARTTLS and login happen once)
+_smtp = threading.local()
+
+# Helper function to close this mail thread's SMTP connection, if any
+def close_smtp_connection():
+    conn = getattr(_smtp, 'conn', None)
+    _smtp.conn = None
+    if conn is not None:
+        try:
+            conn.__exit__(None, None, None)
+        except (smtplib.SMTPException, OSError):
+            pass  # Already dropped by the server
+
+# Helper function returning this mail thread's SMTP connection, reconnecting when it sat idle too long or went dead
+def get_smtp_connection(app):
+    conn = getattr(_smtp, 'conn', None)
+    if conn is not None and conn.host is not None:
+        try:
+            fresh = time.monotonic() - _smtp.last_used < app.config['MAIL_CONNECTION_IDLE_TIMEOUT']
+            alive = fresh and conn.host.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            alive = False
+        if not alive:
+            close_smtp_connection()
+            conn = None
+
+    if conn is None:
+        conn = mail.connect().__enter__()
+        _smtp.conn = conn
+    return conn
+
+# Helper function to send a prepared email from a mail thread
+def send_async_email(app, msg):
+    with app.app_context():
+        try:
+            get_smtp_connection(app).send(msg)
+            _smtp.last_used = time.monotonic()
+        except Exception:
+            close_smtp_connection()
+            app.logger.exception(f'Failed to send email to {msg.recipients}')
+
+# Body of the password reset email; only the link changes per message
+_RESET_BODY_TMPL = '''To reset your password, visit the following link:
+{url}
+If you did not make this request, simply ignore this email and no changes will be made.
+'''
 
 # Helper function to send email
 def send_reset_email(user):
     token = user.get_reset_token()
     msg = Message('Password Reset Request',
-                  sender=os.getenv('MAIL_DEFAULT_SENDER'),
+                  sender=current_app.config['MAIL_DEFAULT_SENDER'],
                   recipients=[user.email])
-    msg.body = f'''To reset your password, visit the following link:
-{request.url_root}reset_password/{token}
-If you did not make this request, simply ignore this email and no changes will be made.
-'''
-    mail.send(msg)
+    msg.body = _RESET_BODY_TMPL.format(url=f'{request.url_root}reset_password/{token}')
+    # SMTP happens off the request thread; the message is fully built here while the request is available
+    _mail_executor.submit(send_async_email, current_app._get_current_object(), msg)
 
 # Register a new user
-@limiter.limit("5 per minute")  # Limit to 5 requests per minute
 @users_bp.route('/register', methods=['POST'])
+@limiter.limit("5 per minute")  # Limit to 5 requests per minute
 def register():
     data = request.get_json()
     if not data or not data.get('email') or not data.get('password'):
-        return jsonify({'message': 'Email and password are required'}), 400
+        return json_response({'message': 'Email and password are required'}, 400)
 
     if User.query.filter_by(email=data['email']).first():
-        return jsonify({'message': 'Email already registered'}), 400
+        return json_response({'message': 'Email already registered'}, 400)
 
-    # Hash the password and create the user
-    hashed_password = generate_password_hash(data['password'])
-    new_user = User(email=data['email'], username=data.get('username'), password_hash=hashed_password)
+    # Hash the password (Argon2id) and create the user
+    new_user = User(email=data['email'], username=data.get('username'))
+    new_user.set_password(data['password'])
     db.session.add(new_user)
     db.session.commit()
+    forget_email_lookup(new_user.email)
 
-    return jsonify({'message': 'User registered successfully'}), 201
+    return json_response({'message': 'User registered successfully'}, 201)
 
 # User login and JWT generation
-@limiter.limit("5 per minute")  # Limit to 5 requests per minute
 @users_bp.route('/login', methods=['POST'])
+@limiter.limit("5 per minute")  # Limit to 5 requests per minute
 def login():
     data = request.get_json()
     if not data or not data.get('email') or not data.get('password'):
-        return jsonify({'message': 'Email and password are required'}), 400
+        return json_response({'message': 'Email and password are required'}, 400)
+
+    user = find_user_by_email(data['email'])
 
-    user = User.query.filter_by(email=data['email']).first()
+    # Unknown emails still pay for one hash verification, keeping login timing the same either way
+    valid = user.check_password(data['password']) if user else check_password_for_missing_user(data['password'])
 
-    if user and check_password_hash(user.password_hash, data['password']):
-        access_token = create_access_token(identity=user.id)
+    if valid:
+        # Persist the hash if check_password upgraded it (legacy PBKDF2 or outdated Argon2 parameters)
+        if db.session.is_modified(user):
+            db.session.commit()
+
+        # is_admin travels in the token so admin routes need no lookup
+        access_token = cached_access_token(user.id, user.is_admin)
         refresh_token = create_refresh_token(identity=user.id)
-        return jsonify({
+        return json_response({
             'access_token': access_token,
             'refresh_token': refresh_token,
             'message': 'Login successful'
-        }), 200
+        }, 200)
     else:
-        return jsonify({'message': 'Invalid credentials'}), 401
+        return json_response({'message': 'Invalid credentials'}, 401)
 
 # Refresh JWT token
 @users_bp.route('/refresh', methods=['POST'])
 @jwt_required(refresh=True)
 def refresh_token():
     current_user = get_jwt_identity()
-    new_access_token = create_access_token(identity=current_user)
-    return jsonify({'access_token': new_access_token}), 200
+    user = db.session.get(User, current_user)
+    if not user:
+        return json_response({'message': 'User not found'}, 404)
+
+    # Re-read is_admin so a role change applies from the next refresh
+    new_access_token = cached_access_token(current_user, user.is_admin)
+    return json_response({'access_token': new_access_token}, 200)
 
 # Get the current user's details
 @users_bp.route('/me', methods=['GET'])
 @jwt_required()
 def get_current_user():
     current_user_id = get_jwt_identity()
-    user = User.query.get(current_user_id)
+    user = db.session.get(User, current_user_id, options=[load_only(*USER_PUBLIC_COLUMNS)])
 
     if not user:
-        return jsonify({'message': 'User not found'}), 404
+        return json_response({'message': 'User not found'}, 404)
 
     user_data = {
         'id': user.id,
@@ -94,46 +215,55 @@ def get_current_user():
         'created_at': user.created_at
     }
 
-    return jsonify(user_data), 200
+    return json_response(user_data, 200)
 
 # Request password reset
-@limiter.limit("3 per hour")  # Limit to 3 password reset requests per hour
 @users_bp.route('/reset_password', methods=['POST'])
+@limiter.limit("3 per hour")  # Limit to 3 password reset requests per hour
+@limiter.limit("3 per hour", key_func=reset_email_rate_limit_key)  # And 3 per hour per email, whichever IPs ask
 def request_password_reset():
-    data = request.get_json()
-    user = User.query.filter_by(email=data['email']).first()
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict) or not isinstance(data.get('email'), str) or not data['email']:
+        return json_response({'message': 'Email is required'}, 400)
+
+    user = find_user_by_email(data['email'])
 
     if user:
         send_reset_email(user)
-    return jsonify({'message': 'If your email exists, you will receive a password reset email shortly.'}), 200
+    return json_response({'message': 'If your email exists, you will receive a password reset email shortly.'}, 200)
 
 # Reset password
 @users_bp.route('/reset_password/<token>', methods=['POST'])
 def reset_password(token):
     user = User.verify_reset_token(token)
     if not user:
-        return jsonify({'message': 'Invalid or expired token'}), 400
+        return json_response({'message': 'Invalid or expired token'}, 400)
 
     data = request.get_json()
     if not data or not data.get('password'):
-        return jsonify({'message': 'Password is required'}), 400
+        return json_response({'message': 'Password is required'}, 400)
 
-    user.password_hash = generate_password_hash(data['password'])
+    user.set_password(data['password'])
     db.session.commit()
 
-    return jsonify({'message': 'Password has been updated'}), 200
+    return json_response({'message': 'Password has been updated'}, 200)
 
 # Admin: Get all users (Admin only)
 @users_bp.route('/users', methods=['GET'])
-@jwt_required()
+@admin_required
 def get_all_users():
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
+    # Keyset pagination: ?cursor= is the last id of the previous page, so each page is one index range scan
+    try:
+        limit = min(max(int(request.args.get('limit', USERS_PAGE_DEFAULT)), 1), USERS_PAGE_MAX)
+        cursor = int(request.args['cursor']) if 'cursor' in request.args else None
+    except ValueError:
+        return json_response({'message': 'limit and cursor must be integers'}, 400)
 
-    if not current_user or not current_user.is_admin:
-        return jsonify({'message': 'Admin access required'}), 403
+    query = select(User).options(load_only(*USER_PUBLIC_COLUMNS)).order_by(User.id).limit(limit)
+    if cursor is not None:
+        query = query.where(User.id > cursor)
+    users = db.session.execute(query).scalars().all()
 
-    users = User.query.all()
     users_data = [
         {
             'id': user.id,
@@ -144,23 +274,68 @@ def get_all_users():
         }
         for user in users
     ]
-    return jsonify(users_data), 200
+    next_cursor = users[-1].id if len(users) == limit else None
+    return json_response({'users': users_data, 'next_cursor': next_cursor}, 200)
+
+# Admin: Create many users in one request (Admin only)
+@users_bp.route('/users/bulk', methods=['POST'])
+@admin_required
+def bulk_create_users():
+    data = request.get_json()
+    if not isinstance(data, list) or not data:
+        return json_response({'message': 'A list of users is required'}, 400)
+    if len(data) > BULK_USERS_MAX:
+        return json_response({'message': f'At most {BULK_USERS_MAX} users per request'}, 400)
+    if not all(isinstance(row, dict) and all(isinstance(row.get(field), str) and row.get(field)
+                                             for field in ('email', 'username', 'password')) for row in data):
+        return json_response({'message': 'Email, username and password are required'}, 400)
+
+    # Everything the unique constraints would reject is caught here, before any password is hashed
+    emails = [row['email'] for row in data]
+    if len(set(emails)) != len(emails):
+        return json_response({'message': 'Duplicate emails in request'}, 400)
+    usernames = [row['username'] for row in data]
+    if len(set(usernames)) != len(usernames):
+        return json_response({'message': 'Duplicate usernames in request'}, 400)
+    if db.session.scalar(select(User.email).where(User.email.in_(emails)).limit(1)):
+        return json_response({'message': 'Email already registered'}, 400)
+    if db.session.scalar(select(User.username).where(User.username.in_(usernames)).limit(1)):
+        return json_response({'message': 'Username already taken'}, 400)
+
+    try:
+        # Hash on every core at once, then insert all rows in a single INSERT ... RETURNING
+        password_hashes = hash_passwords([row['password'] for row in data])
+        rows = [
+            {
+                'email': row['email'],
+                'username': row['username'],
+                'is_admin': row.get('is_admin') is True,  # Only a JSON true grants admin
+                'password_hash': password_hash
+            }
+            for row, password_hash in zip(data, password_hashes)
+        ]
+        # sort_by_parameter_order keeps the returned ids in request order
+        user_ids = db.session.scalars(insert(User).returning(User.id, sort_by_parameter_order=True), rows).all()
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        return json_response({'message': f'An error occurred: {str(e)}'}, 500)
+
+    for email in emails:
+        forget_email_lookup(email)
+
+    return json_response({'message': 'Users created successfully', 'ids': user_ids}, 201)
 
 # Admin: Delete a user (Admin only)
 @users_bp.route('/users/<int:user_id>', methods=['DELETE'])
-@jwt_required()
+@admin_required
 def delete_user(user_id):
-    current_user_id = get_jwt_identity()
-    current_user = User.query.get(current_user_id)
-
-    if not current_user or not current_user.is_admin:
-        return jsonify({'message': 'Admin access required'}), 403
-
-    user = User.query.get(user_id)
+    user = db.session.get(User, user_id, options=[load_only(User.id, User.email)])
     if not user:
-        return jsonify({'message': 'User not found'}), 404
+        return json_response({'message': 'User not found'}, 404)
 
     db.session.delete(user)
     db.session.commit()
+    forget_email_lookup(user.email)
 
-    return jsonify({'message': 'User deleted successfully'}), 200
+    return json_response({'message': 'User deleted successfully'}, 200)
@@ -10,6 +10,15 @@ class Config:
     # Database Configuration
     SQLALCHEMY_DATABASE_URI = os.getenv('DATABASE_URL', 'sqlite:///amber.db')  # Default to SQLite, or use DATABASE_URL from environment
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_BINDS = {'replica': os.getenv('READ_DATABASE_URL')} if os.getenv('READ_DATABASE_URL') else {}  # Optional read replica for the admin dashboard
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.getenv('DB_POOL_SIZE', 10)),  # Connections kept open per worker process
+        'max_overflow': int(os.getenv('DB_MAX_OVERFLOW', 20)),  # Extra connections allowed under burst load
+        'pool_pre_ping': True,  # Transparently replace connections dropped by the server
+        'pool_recycle': 1800,  # Recycle connections before server-side idle timeouts
+        'pool_use_lifo': True,  # Reuse the most recent connection so idle extras age out instead of all staying warm
+        'query_cache_size': 1200  # Compiled statements cached per engine (SQLAlchemy's default is 500)
+    }
 
     # JWT Configuration
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-jwt-secret-key')  # Secret key for JWT
@@ -28,13 +37,36 @@ class Config:
     MAIL_USERNAME = os.getenv('MAIL_USERNAME', 'your-email@gmail.com')
     MAIL_PASSWORD = os.getenv('MAIL_PASSWORD', 'your-email-password')
     MAIL_DEFAULT_SENDER = os.getenv('MAIL_DEFAULT_SENDER', 'noreply@amber.com')
+    MAIL_CONNECTION_IDLE_TIMEOUT = 60  # Seconds a mail thread keeps an unused SMTP connection before reconnecting
+
+    # Password Hashing Configuration (Argon2id)
+    # Hashing time grows linearly with both costs: lower them for tests and local work, raise them as hardware allows
+    PASSWORD_HASH_TIME_COST = int(os.getenv('PASSWORD_HASH_TIME_COST', 2))  # Passes over memory
+    PASSWORD_HASH_MEMORY_COST = int(os.getenv('PASSWORD_HASH_MEMORY_COST', 64 * 1024))  # KiB per hash
 
     # Flask-Limiter Configuration (Rate Limiting)
     RATELIMIT_HEADERS_ENABLED = True  # Show rate limit headers in responses
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URL', 'redis://localhost:6379/1')  # Shared by every worker
+    RATELIMIT_STRATEGY = 'moving-window'
+    RATELIMIT_IN_MEMORY_FALLBACK_ENABLED = True  # Keep limiting per worker if Redis is unreachable
+
+    # Flask-Caching Configuration (shared response cache)
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'RedisCache')
+    CACHE_REDIS_URL = os.getenv('CACHE_REDIS_URL', 'redis://localhost:6379/0')
+    CACHE_DEFAULT_TIMEOUT = 30  # Seconds
+
+    # Flask-Compress Configuration (response compression, Brotli preferred)
+    COMPRESS_ALGORITHM = ['br', 'gzip']
+    COMPRESS_BR_LEVEL = 4  # Cheap on CPU while still well ahead of gzip on JSON
+    COMPRESS_MIN_SIZE = 512  # Bytes; smaller responses are sent as-is
 
     # File Upload Configuration
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file upload size
     UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')  # Default folder for uploaded files
+    UPLOADS_ACCEL_REDIRECT = os.getenv('UPLOADS_ACCEL_REDIRECT')  # Internal nginx location (e.g. '/protected_uploads/') that serves uploads via X-Accel-Redirect
+    MAX_FORM_MEMORY_SIZE = 500 * 1024  # Max size of non-file form fields kept in memory
+    UPLOAD_SPOOL_MAX_SIZE = 1024 * 1024  # Uploads larger than 1MB are written straight to a temp file
+    IMAGE_QUEUE_REDIS_URL = os.getenv('IMAGE_QUEUE_REDIS_URL')  # Redis for the RQ 'post_images' queue; uploads are kept unprocessed when unset
 
     # Logging Configuration
     LOG_TO_STDOUT = os.getenv('LOG_TO_STDOUT')  # Log to stdout for Heroku or Docker environments
@@ -42,9 +74,9 @@ class Config:
     # Socket.IO Configuration (Real-time notifications)
     SOCKETIO_MESSAGE_QUEUE = os.getenv('SOCKETIO_MESSAGE_QUEUE', None)  # Use a message queue (e.g., Redis) for scalability
 
-    # Flask Session Configuration (optional)
-    SESSION_TYPE = 'filesystem'
-    SESSION_PERMANENT = False
+    # Gevent Configuration
+    GEVENT_WORKERS = os.getenv('GEVENT_WORKERS')  # Set when served by gevent workers so psycopg2 yields during queries
+    # Gunicorn worker count: 1 while Socket.IO runs without SOCKETIO_MESSAGE_QUEUE, otherwise about 2 * CPU cores + 1
 
     # Additional Configurations (if necessary)...
 
@@ -52,6 +84,10 @@ class Config:
 class DevelopmentConfig(Config):
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = os.getenv('DEV_DATABASE_URL', 'sqlite:///amber-dev.db')  # Development database
+    CACHE_TYPE = os.getenv('CACHE_TYPE', 'SimpleCache')  # In-process cache, no Redis needed locally
+    RATELIMIT_STORAGE_URI = os.getenv('RATELIMIT_STORAGE_URL', 'memory://')
+    PASSWORD_HASH_TIME_COST = 1
+    PASSWORD_HASH_MEMORY_COST = 16 * 1024
 
 
 class TestingConfig(Config):
@@ -59,6 +95,10 @@ class TestingConfig(Config):
     SQLALCHEMY_DATABASE_URI = os.getenv('TEST_DATABASE_URL', 'sqlite:///amber-test.db')
     WTF_CSRF_ENABLED = False  # Disable CSRF for testing purposes
     JWT_ACCESS_TOKEN_EXPIRES = timedelta(minutes=5)  # Shorter expiry for testing
+    CACHE_TYPE = 'NullCache'  # Never serve cached responses in tests
+    RATELIMIT_STORAGE_URI = 'memory://'
+    PASSWORD_HASH_TIME_COST = 1  # Cheapest settings Argon2 allows; tests register many users
+    PASSWORD_HASH_MEMORY_COST = 8
 
 
 class ProductionConfig(Config):
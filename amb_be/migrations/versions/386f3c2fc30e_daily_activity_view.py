@@ -0,0 +1,36 @@
+"""daily_activity materialized view for admin analytics
+
+Revision ID: 386f3c2fc30e
+Revises: cda38d03e11f
+Create Date: 2026-10-15 11:31:05.640218
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '386f3c2fc30e'
+down_revision = 'cda38d03e11f'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL only; other databases compute the same rows live (app.models.daily_activity_source)
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "CREATE MATERIALIZED VIEW daily_activity AS "
+        "SELECT 'posts' AS kind, date(date_posted) AS day, user_id, count(*) AS total FROM posts GROUP BY 2, 3 "
+        "UNION ALL "
+        "SELECT 'comments', date(date_posted), user_id, count(*) FROM comments GROUP BY 2, 3"
+    )
+    # REFRESH MATERIALIZED VIEW CONCURRENTLY (flask refresh-activity) needs a unique index
+    op.execute('CREATE UNIQUE INDEX ix_daily_activity_kind_day_user ON daily_activity (kind, day, user_id)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('DROP MATERIALIZED VIEW daily_activity')
@@ -0,0 +1,51 @@
+"""ON DELETE CASCADE from posts to subtype rows and comments
+
+Revision ID: 387a30be75e2
+Revises: 8c1d0f78ed14
+Create Date: 2026-10-15 11:18:51.264730
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '387a30be75e2'
+down_revision = '8c1d0f78ed14'
+branch_labels = None
+depends_on = None
+
+# (table, column) pairs whose foreign key references posts.id
+POST_FOREIGN_KEYS = [
+    ('found_post', 'id'),
+    ('lost_post', 'id'),
+    ('looking_post', 'id'),
+    ('stolen_post', 'id'),
+    ('comments', 'post_id'),
+]
+
+# SQLite reflects these foreign keys without a name; the convention names them so batch mode can drop them
+NAMING_CONVENTION = {'fk': 'fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s'}
+
+
+def fk_name(table, column):
+    # PostgreSQL's default name for the unnamed constraints the initial revision created
+    if op.get_bind().dialect.name == 'postgresql':
+        return f'{table}_{column}_fkey'
+    return f'fk_{table}_{column}_posts'
+
+
+def recreate_post_foreign_keys(ondelete):
+    for table, column in POST_FOREIGN_KEYS:
+        name = fk_name(table, column)
+        with op.batch_alter_table(table, naming_convention=NAMING_CONVENTION) as batch_op:
+            batch_op.drop_constraint(name, type_='foreignkey')
+            batch_op.create_foreign_key(name, 'posts', [column], ['id'], ondelete=ondelete)
+
+
+def upgrade():
+    recreate_post_foreign_keys('CASCADE')
+
+
+def downgrade():
+    recreate_post_foreign_keys(None)
@@ -0,0 +1,33 @@
+"""Review foreign key, posts by user and date, and admin user indexes
+
+Revision ID: 3be555392c43
+Revises: 386f3c2fc30e
+Create Date: 2026-10-15 11:33:48.021577
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3be555392c43'
+down_revision = '386f3c2fc30e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_users_is_admin', 'users', ['is_admin'], unique=False, postgresql_where=sa.text('is_admin'))
+    op.create_index('ix_posts_user_date', 'posts', ['user_id', 'date_posted'], unique=False)
+    # ix_posts_user_date also serves plain user_id lookups
+    op.drop_index(op.f('ix_posts_user_id'), table_name='posts')
+    op.create_index(op.f('ix_reviews_user_id'), 'reviews', ['user_id'], unique=False)
+    op.create_index(op.f('ix_reviews_reviewed_user_id'), 'reviews', ['reviewed_user_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_reviews_reviewed_user_id'), table_name='reviews')
+    op.drop_index(op.f('ix_reviews_user_id'), table_name='reviews')
+    op.create_index(op.f('ix_posts_user_id'), 'posts', ['user_id'], unique=False)
+    op.drop_index('ix_posts_user_date', table_name='posts')
+    op.drop_index('ix_users_is_admin', table_name='users')
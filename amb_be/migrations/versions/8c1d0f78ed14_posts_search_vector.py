@@ -0,0 +1,34 @@
+"""Full-text search vector on posts
+
+Revision ID: 8c1d0f78ed14
+Revises: edbafd5de6b7
+Create Date: 2026-10-15 11:14:37.902154
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c1d0f78ed14'
+down_revision = 'edbafd5de6b7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # PostgreSQL only: SQLite searches fall back to LIKE and never read the column
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute(
+        "ALTER TABLE posts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS "
+        "(to_tsvector('english', coalesce(description, '') || ' ' || coalesce(location, ''))) STORED"
+    )
+    op.execute('CREATE INDEX ix_posts_search_vector ON posts USING gin (search_vector)')
+
+
+def downgrade():
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.drop_index('ix_posts_search_vector', table_name='posts')
+    op.drop_column('posts', 'search_vector')
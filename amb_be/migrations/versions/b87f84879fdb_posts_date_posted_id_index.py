@@ -0,0 +1,24 @@
+"""Newest-first index for post keyset pagination
+
+Revision ID: b87f84879fdb
+Revises: 387a30be75e2
+Create Date: 2026-10-15 11:22:40.577903
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b87f84879fdb'
+down_revision = '387a30be75e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_posts_date_posted_id', 'posts', [sa.text('date_posted DESC'), sa.text('id DESC')])
+
+
+def downgrade():
+    op.drop_index('ix_posts_date_posted_id', table_name='posts')
@@ -0,0 +1,28 @@
+"""Indexes on the post and comment foreign keys
+
+Revision ID: cda38d03e11f
+Revises: b87f84879fdb
+Create Date: 2026-10-15 11:24:13.116482
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'cda38d03e11f'
+down_revision = 'b87f84879fdb'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index(op.f('ix_posts_user_id'), 'posts', ['user_id'], unique=False)
+    op.create_index(op.f('ix_comments_user_id'), 'comments', ['user_id'], unique=False)
+    op.create_index(op.f('ix_comments_post_id'), 'comments', ['post_id'], unique=False)
+
+
+def downgrade():
+    op.drop_index(op.f('ix_comments_post_id'), table_name='comments')
+    op.drop_index(op.f('ix_comments_user_id'), table_name='comments')
+    op.drop_index(op.f('ix_posts_user_id'), table_name='posts')
@@ -0,0 +1,33 @@
+"""pg_trgm trigram indexes for post search
+
+Revision ID: edbafd5de6b7
+Revises: 8e57ccb063a7
+Create Date: 2026-10-15 11:10:02.418315
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'edbafd5de6b7'
+down_revision = '8e57ccb063a7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        # The gin_trgm_ops operator class comes from pg_trgm, so the extension must exist first
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.execute('CREATE INDEX ix_posts_description_trgm ON posts USING gin (lower(description) gin_trgm_ops)')
+        op.execute('CREATE INDEX ix_posts_location_trgm ON posts USING gin (lower(location) gin_trgm_ops)')
+    else:
+        op.create_index('ix_posts_description_trgm', 'posts', [sa.text('lower(description)')])
+        op.create_index('ix_posts_location_trgm', 'posts', [sa.text('lower(location)')])
+
+
+def downgrade():
+    # pg_trgm is left installed; other database objects may rely on it
+    op.drop_index('ix_posts_location_trgm', table_name='posts')
+    op.drop_index('ix_posts_description_trgm', table_name='posts')
@@ -1,8 +1,16 @@
+import os
+
+# Under gevent, patch blocking I/O to be cooperative before anything else imports socket/ssl/threading
+if os.getenv('GEVENT_WORKERS'):
+    from gevent import monkey
+    monkey.patch_all()
+
 from app import create_app, db, socketio
 from flask_migrate import Migrate
-import os
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import RotatingFileHandler, QueueHandler, QueueListener
 
 # Initialize the Flask application using the factory function
 app = create_app()
@@ -18,9 +26,16 @@ if not app.debug and not app.testing:
     file_handler.setLevel(logging.INFO)
     formatter = logging.Formatter('%(asctime)s %(levelname)s: %(message)s [in %(pathname)s:%(lineno)d]')
     file_handler.setFormatter(formatter)
-    app.logger.addHandler(file_handler)
+    # Request threads only enqueue records; a listener thread does the file writes and rotation
+    log_queue = queue.Queue(-1)
+    log_listener = QueueListener(log_queue, file_handler, respect_handler_level=True)
+    log_listener.start()
+    atexit.register(log_listener.stop)
+    app.logger.addHandler(QueueHandler(log_queue))
     app.logger.info('Amber startup')
 
-# Run the app with Socket.IO support for real-time notifications
+# Run the app with Socket.IO support for real-time notifications (development server only)
 if __name__ == '__main__':
+    if os.getenv('FLASK_ENV') != 'development':
+        raise SystemExit('The development server needs FLASK_ENV=development; serve wsgi:app with gunicorn otherwise (see wsgi.py)')
     socketio.run(app, host='0.0.0.0', port=5000)
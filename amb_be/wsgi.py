@@ -0,0 +1,7 @@
+# WSGI entry point for production servers. Serve with gevent workers, e.g.:
+#
+#   GEVENT_WORKERS=1 gunicorn -k geventwebsocket.gunicorn.workers.GeventWebSocketWorker -w 1 wsgi:app
+#
+# Each gevent worker handles many concurrent connections. Socket.IO needs sticky sessions and
+# SOCKETIO_MESSAGE_QUEUE before running more than one worker (-w $((2 * $(nproc) + 1))).
+from run import app